@@ -9,17 +9,24 @@ files into the output directory without manual interaction.
 from __future__ import annotations
 
 import argparse
+import collections
+import contextlib
+import json
 import logging
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
 import threading
 import time
-from dataclasses import dataclass
+import concurrent.futures
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Set
+from typing import Dict, Iterable, List, Sequence, Set
 
-from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.events import FileSystemEvent, PatternMatchingEventHandler
 from watchdog.observers import Observer
 
 from PIL import Image, UnidentifiedImageError
@@ -54,6 +61,11 @@ VIDEO_EXTENSIONS = {
 }
 
 
+# Thread budget per ffmpeg invocation; kept in step with the parallel video
+# pool so concurrent encodes roughly fill the machine without oversubscribing.
+FFMPEG_THREADS = 4
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Watch a folder and convert images to PNG and videos to MP3 automatically."
@@ -107,6 +119,40 @@ def parse_args() -> argparse.Namespace:
         default="medium",
         help="x264 preset controlling encode speed vs quality (e.g., veryfast, faster, medium).",
     )
+    parser.add_argument(
+        "--png-compress-level",
+        type=int,
+        default=1,
+        choices=range(0, 10),
+        help="zlib compression level for PNG output, 0-9 (default 1: fast, slightly larger files).",
+    )
+    parser.add_argument(
+        "--max-concurrent-video",
+        type=int,
+        default=None,
+        help=(
+            "Maximum number of simultaneous ffmpeg encodes. Defaults to 2 for nvenc "
+            "(consumer GPUs allow only 2 sessions) and cpu_count/4 for libx264."
+        ),
+    )
+    parser.add_argument(
+        "--hw-accel",
+        type=str,
+        default="none",
+        choices=["none", "nvenc", "vaapi", "videotoolbox"],
+        help="Hardware encoder to use instead of libx264 (default: none).",
+    )
+    parser.add_argument(
+        "--two-pass",
+        action="store_true",
+        help="Run libx264 in two passes for better quality per byte (ignored with --hw-accel).",
+    )
+    parser.add_argument(
+        "--video-bitrate",
+        type=str,
+        default="5M",
+        help="Target video bitrate for --two-pass encoding (default: 5M).",
+    )
     return parser.parse_args()
 
 
@@ -127,27 +173,68 @@ def configure_image_plugins() -> None:
         )
 
 
+def init_image_worker() -> None:
+    """
+    Initializer for image pool workers. With the spawn start method (the
+    macOS default) children inherit neither the logging setup nor the HEIF
+    opener registration, so both must happen in-process.
+    """
+    configure_logging()
+    configure_image_plugins()
+
+
 def ensure_directory(path: Path) -> None:
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
 
 
-def wait_for_file_ready(path: Path, timeout: float = 300.0, stable_checks: int = 3, interval: float = 0.5) -> bool:
+def wait_for_file_ready(
+    path: Path,
+    timeout: float = 300.0,
+    stable_checks: int = 2,
+    interval: float = 0.1,
+    closed_event: threading.Event | None = None,
+    missing_checks: int = 5,
+) -> bool:
     """
-    Poll the file until its size stays constant for a few checks.
-    Returns True if the file looks stable, False if the timeout expires.
+    Wait until the writer is done with the file.
+
+    When closed_event is supplied (Linux, where watchdog delivers IN_CLOSE_WRITE
+    as on_closed) the wait is event-driven and returns as soon as the writer
+    closes the file. Otherwise fall back to polling until the size stays
+    constant for a couple of checks. Returns False if the timeout expires or
+    the file stays missing for missing_checks consecutive polls (deleted
+    between the event and worker pickup).
     """
+    # Fast path: a non-empty file whose mtime is already over a second old
+    # was complete when it appeared (typical for mv/rename into the watched
+    # dir) — no need to poll at all.
+    try:
+        stat = path.stat()
+        if stat.st_size > 0 and (time.time() - stat.st_mtime) > 1.0:
+            return True
+    except FileNotFoundError:
+        pass
+
     deadline = time.monotonic() + timeout
     last_size = -1
     stable_count = 0
+    missing_count = 0
 
     while time.monotonic() < deadline:
+        if closed_event is not None and closed_event.is_set():
+            return path.exists()
+
         try:
             size = path.stat().st_size
+            missing_count = 0
         except FileNotFoundError:
+            missing_count += 1
+            if missing_count >= missing_checks:
+                logging.debug("File %s gone after %d checks; giving up.", path, missing_count)
+                return False
             logging.debug("File %s missing while waiting; retrying.", path)
-            time.sleep(interval)
-            continue
+            size = -1
 
         if size == last_size and size > 0:
             stable_count += 1
@@ -157,72 +244,277 @@ def wait_for_file_ready(path: Path, timeout: float = 300.0, stable_checks: int =
             stable_count = 0
             last_size = size
 
-        time.sleep(interval)
+        # Sleep on the event rather than unconditionally, so a close
+        # notification wakes us immediately instead of after the interval.
+        if closed_event is not None:
+            if closed_event.wait(interval):
+                return path.exists()
+        else:
+            time.sleep(interval)
 
     return False
 
 
-def convert_image_to_png(src: Path, dest_dir: Path) -> None:
+class ConversionCache:
+    """
+    Tiny size+mtime index of already-converted sources, kept as JSON next to
+    the outputs. Lets a restart skip files whose bytes have not changed even
+    when the output was renamed or removed, turning warm starts into stats
+    instead of encodes.
+    """
+
+    FILENAME = ".convert-cache.json"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[int]] = {}
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "ConversionCache":
+        cache = cls(output_dir / cls.FILENAME)
+        try:
+            with open(cache.path, "r", encoding="utf-8") as fh:
+                cache._entries = json.load(fh)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            logging.warning("Conversion cache at %s unreadable; starting fresh.", cache.path)
+        return cache
+
+    def is_current(self, src: Path) -> bool:
+        try:
+            stat = src.stat()
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            return self._entries.get(str(src)) == [stat.st_size, stat.st_mtime_ns]
+
+    def record(self, src: Path) -> None:
+        try:
+            stat = src.stat()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._entries[str(src)] = [stat.st_size, stat.st_mtime_ns]
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            logging.warning("Could not persist conversion cache %s: %s", self.path, exc)
+
+
+def convert_image_to_png(src: Path, dest_dir: Path, compress_level: int = 1) -> bool:
+    """Convert one image; returns True on success. Safe to run in a worker process."""
     output_path = dest_dir / (src.stem + ".png")
     if output_path.exists():
         logging.info("Image output already exists, skipping: %s", output_path)
-        return
+        return False
 
     try:
         with Image.open(src) as img:
-            if img.mode not in ("RGB", "RGBA"):
+            if img.format == "JPEG":
+                # No-op at full size, but lets libjpeg take its fast
+                # colorspace path during decode.
+                img.draft("RGB", img.size)
+            # PNG natively supports these modes; converting them would only
+            # allocate a full uncompressed RGB(A) buffer for nothing.
+            if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
                 img = img.convert("RGBA" if "A" in img.mode else "RGB")
-            img.save(output_path, format="PNG")
+            # zlib level 1 saves 4-5x faster than the default 6 at ~10%
+            # larger files, a fair trade for an auto-convert drop folder.
+            img.save(output_path, format="PNG", optimize=False, compress_level=compress_level)
     except UnidentifiedImageError:
         logging.error("Cannot identify image file: %s", src)
-        return
+        return False
     except Exception as exc:
         logging.exception("Failed to convert image %s: %s", src, exc)
-        return
+        return False
 
     logging.info("Converted image to PNG: %s -> %s", src.name, output_path.name)
+    return True
 
 
-def convert_video_to_mp4(src: Path, dest_dir: Path, ffmpeg_bin: str, video_crf: str, video_preset: str) -> None:
-    output_path = dest_dir / (src.stem + ".mp4")
-    if output_path.exists():
-        logging.info("Video output already exists, skipping: %s", output_path)
+def run_image_job(src: Path, dest_dir: Path, config: "ConversionConfig") -> None:
+    """
+    Convert one image, dispatching the decode to the shared image process
+    pool when one is configured. The conversion cache is consulted and
+    updated here, in the parent — its lock cannot cross process boundaries.
+    """
+    if config.cache is not None and config.cache.is_current(src):
+        logging.info("Input unchanged since last conversion, skipping: %s", src.name)
         return
 
-    cmd = [
-        ffmpeg_bin,
-        "-y",
-        "-i",
-        str(src),
+    if config.image_pool is not None:
+        converted = config.image_pool.submit(
+            convert_image_to_png, src, dest_dir, config.png_compress_level
+        ).result()
+    else:
+        converted = convert_image_to_png(src, dest_dir, config.png_compress_level)
+
+    if converted and config.cache is not None:
+        config.cache.record(src)
+
+
+def build_video_encode_args(config: "ConversionConfig", two_pass: bool = False) -> tuple[list, list]:
+    """
+    Return (input_args, codec_args) for ffmpeg based on the selected encoder.
+    input_args go before -i; codec_args go between the input and the output path.
+    """
+    # yuv420p keeps HDR/4:2:2 sources web-compatible; the vaapi path already
+    # forces nv12 on upload, so it must not be overridden there.
+    if config.hw_accel == "videotoolbox":
+        return [], ["-c:v", "h264_videotoolbox", "-b:v", "5M", "-pix_fmt", "yuv420p"]
+    if config.hw_accel == "nvenc":
+        return [], ["-c:v", "h264_nvenc", "-preset", "p4", "-cq", config.video_crf, "-pix_fmt", "yuv420p"]
+    if config.hw_accel == "vaapi":
+        return (
+            ["-hwaccel", "vaapi", "-vaapi_device", "/dev/dri/renderD128"],
+            ["-vf", "format=nv12,hwupload", "-c:v", "h264_vaapi", "-qp", config.video_crf],
+        )
+    # Software fallback: libx264 on the CPU, with a thread budget chosen so
+    # that encoder threads times concurrent encodes roughly fills the cores.
+    if config.max_concurrent_video:
+        threads = max(1, (os.cpu_count() or 1) // config.max_concurrent_video)
+    else:
+        threads = FFMPEG_THREADS
+    # x264 rejects CRF combined with two-pass stat reading, so the two-pass
+    # variant rate-controls against the target bitrate instead.
+    if two_pass:
+        rate_args = ["-b:v", config.video_bitrate]
+    else:
+        rate_args = ["-crf", config.video_crf]
+    return [], [
         "-c:v",
         "libx264",
         "-preset",
-        video_preset,
-        "-crf",
-        video_crf,
-        "-c:a",
-        "aac",
-        "-b:a",
-        "192k",
-        str(output_path),
+        config.video_preset,
+        *rate_args,
+        "-pix_fmt",
+        "yuv420p",
+        "-threads",
+        str(threads),
     ]
 
-    logging.debug("Running ffmpeg: %s", " ".join(cmd))
-    try:
-        # Capture stderr only; ffmpeg writes progress to stderr.
-        result = subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
-    except subprocess.CalledProcessError as exc:
-        logging.error("ffmpeg failed for %s:\n%s", src, exc.stderr.strip())
-        if output_path.exists():
-            output_path.unlink(missing_ok=True)
+
+@dataclass
+class OutputSpec:
+    """One ffmpeg output: encoder/filter args followed by the target path."""
+
+    path: Path
+    args: Sequence[str]
+
+
+def convert_video(src: Path, outputs: List[OutputSpec], config: "ConversionConfig") -> None:
+    """
+    Encode src into one or more outputs with a single ffmpeg invocation, so
+    the source is read and decoded once regardless of the number of targets.
+
+    Two-pass mode only supports a single output: ffmpeg names pass-1 stats
+    files by output-stream index, so the stats written for the lone null
+    output of pass 1 would not line up with a multi-output pass 2.
+    """
+    if config.cache is not None and config.cache.is_current(src):
+        logging.info("Input unchanged since last conversion, skipping: %s", src.name)
         return
-    except FileNotFoundError:
-        logging.error("ffmpeg binary not found. Set --ffmpeg-bin or install ffmpeg.")
+
+    todo = []
+    for spec in outputs:
+        if spec.path.exists():
+            logging.info("Video output already exists, skipping: %s", spec.path)
+        else:
+            todo.append(spec)
+    if not todo:
         return
 
-    logging.info("Converted video to MP4: %s -> %s", src.name, output_path.name)
-    if result.stderr:
-        logging.debug("ffmpeg output: %s", result.stderr.strip())
+    base_cmd = [*config.ffmpeg_prefix, "-i", str(src)]
+    two_pass = config.effective_two_pass
+    if two_pass and len(todo) > 1:
+        logging.warning(
+            "Two-pass encoding supports a single output; encoding %s in one pass.", src.name
+        )
+        two_pass = False
+    passlog_dir = tempfile.mkdtemp(prefix="convert-2pass-") if two_pass else None
+    try:
+        if two_pass:
+            # Pass 1 analyses video only into the passlog; pass 2 produces
+            # the real outputs from the collected statistics.
+            passlog = os.path.join(passlog_dir, "ffmpeg2pass")
+            first = [
+                *base_cmd,
+                *config.video_codec_args_two_pass,
+                "-pass", "1", "-passlogfile", passlog,
+                "-an", "-f", "null", os.devnull,
+            ]
+            second = list(base_cmd)
+            for spec in todo:
+                second.extend([*spec.args, "-pass", "2", "-passlogfile", passlog, str(spec.path)])
+            cmds = [first, second]
+        else:
+            cmd = list(base_cmd)
+            for spec in todo:
+                cmd.extend(spec.args)
+                cmd.append(str(spec.path))
+            cmds = [cmd]
+
+        # Cap simultaneous encodes: hardware encoders have hard session limits
+        # (consumer NVENC allows 2) and extra libx264 processes just thrash.
+        # The gate spans both passes — they are one logical encode.
+        gate = config.video_semaphore if config.video_semaphore is not None else contextlib.nullcontext()
+        # Keep only the last ~64 KiB of stderr — enough for any error message —
+        # so memory stays constant regardless of how long the encode runs.
+        stderr_tail: collections.deque = collections.deque(maxlen=16)
+        with gate:
+            for cmd in cmds:
+                logging.debug("Running ffmpeg: %s", " ".join(cmd))
+                stderr_tail = collections.deque(maxlen=16)
+                try:
+                    proc = subprocess.Popen(
+                        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+                    )
+                    while True:
+                        chunk = proc.stderr.read(4096)
+                        if not chunk:
+                            break
+                        stderr_tail.append(chunk)
+                    returncode = proc.wait()
+                except FileNotFoundError:
+                    logging.error("ffmpeg binary not found. Set --ffmpeg-bin or install ffmpeg.")
+                    return
+
+                if returncode != 0:
+                    logging.error("ffmpeg failed for %s:\n%s", src, "".join(stderr_tail).strip())
+                    for spec in todo:
+                        spec.path.unlink(missing_ok=True)
+                    return
+    finally:
+        if passlog_dir is not None:
+            shutil.rmtree(passlog_dir, ignore_errors=True)
+
+    if config.cache is not None:
+        config.cache.record(src)
+    for spec in todo:
+        logging.info("Converted video: %s -> %s", src.name, spec.path.name)
+    if stderr_tail:
+        logging.debug("ffmpeg output: %s", "".join(stderr_tail).strip())
+
+
+def convert_video_to_mp4(src: Path, dest_dir: Path, config: "ConversionConfig") -> None:
+    codec_args = (
+        config.video_codec_args_two_pass if config.effective_two_pass else config.video_codec_args
+    )
+    # +faststart moves the moov atom to the front at finalize time, sparing
+    # players a full-file scan before playback starts.
+    mp4_spec = OutputSpec(
+        path=dest_dir / (src.stem + ".mp4"),
+        args=[*codec_args, "-c:a", "aac", "-b:a", "192k", "-movflags", "+faststart"],
+    )
+    convert_video(src, [mp4_spec], config)
 
 
 @dataclass
@@ -234,6 +526,31 @@ class ConversionConfig:
     ffmpeg_bin: str
     video_crf: str
     video_preset: str
+    hw_accel: str = "none"
+    two_pass: bool = False
+    video_bitrate: str = "5M"
+    png_compress_level: int = 1
+    max_concurrent_video: int = 0
+    video_semaphore: threading.BoundedSemaphore | None = None
+    cache: ConversionCache | None = None
+    image_pool: ProcessPoolExecutor | None = None
+    # Derived once here — the config is immutable in practice, so there is no
+    # point rebuilding the invariant parts of the ffmpeg argv per file.
+    ffmpeg_prefix: tuple[str, ...] = field(init=False, repr=False)
+    video_codec_args: tuple[str, ...] = field(init=False, repr=False)
+    video_codec_args_two_pass: tuple[str, ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        input_args, codec_args = build_video_encode_args(self)
+        self.ffmpeg_prefix = (self.ffmpeg_bin, "-y", "-loglevel", "error", "-nostats", *input_args)
+        self.video_codec_args = tuple(codec_args)
+        _, two_pass_args = build_video_encode_args(self, two_pass=True)
+        self.video_codec_args_two_pass = tuple(two_pass_args)
+
+    @property
+    def effective_two_pass(self) -> bool:
+        # Rate-control passes are a libx264 concept; hardware encoders ignore them.
+        return self.two_pass and self.hw_accel == "none"
 
     @property
     def image_output_dir(self) -> Path:
@@ -244,12 +561,43 @@ class ConversionConfig:
         return self.output_dir / "videos"
 
 
-class ConversionHandler(FileSystemEventHandler):
+class ConversionHandler(PatternMatchingEventHandler):
+    # Small fixed pool; ffmpeg/x264 is already multithreaded, so a worker per
+    # event would only oversubscribe the CPU.
+    MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+    # Writers produce bursts of on_modified events; events landing within this
+    # window are coalesced into a single conversion job.
+    DEBOUNCE_SECONDS = 0.2
+
     def __init__(self, config: ConversionConfig):
-        super().__init__()
+        # Filter in watchdog's dispatch so ignored files never reach the
+        # handler methods: only interesting suffixes, no dotfiles, no dirs.
+        all_exts = frozenset(config.image_exts | config.video_exts)
+        super().__init__(
+            patterns=[f"*{ext}" for ext in sorted(all_exts)],
+            ignore_patterns=["*/.*"],
+            ignore_directories=True,
+        )
+        self._all_exts = all_exts
         self.config = config
         self._lock = threading.Lock()
-        self._in_progress: Set[Path] = set()
+        self._in_flight: Dict[Path, Future] = {}
+        self._closed: Dict[Path, threading.Event] = {}
+        self._pending: Dict[Path, threading.Timer] = {}
+        self._shutting_down = False
+        self._pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            # A timer that already fired may be blocked on the lock right
+            # now; the flag stops it from submitting to the closed pool.
+            self._shutting_down = True
+            timers = list(self._pending.values())
+            self._pending.clear()
+        for timer in timers:
+            timer.cancel()
+        self._pool.shutdown(wait=False)
 
     def on_created(self, event: FileSystemEvent) -> None:
         if not event.is_directory:
@@ -259,51 +607,106 @@ class ConversionHandler(FileSystemEventHandler):
         if not event.is_directory:
             self._schedule(Path(event.src_path))
 
+    def on_closed(self, event: FileSystemEvent) -> None:
+        # Delivered on Linux (IN_CLOSE_WRITE); lets workers stop waiting the
+        # moment the writer finishes instead of polling for a stable size.
+        if event.is_directory:
+            return
+        path = Path(event.src_path)
+        with self._lock:
+            closed = self._closed.get(path)
+        if closed is not None:
+            closed.set()
+        self._schedule(path)
+
     def _schedule(self, path: Path) -> None:
         if self._should_ignore(path):
             return
 
         with self._lock:
-            if path in self._in_progress:
+            if path in self._in_flight:
                 return
-            self._in_progress.add(path)
-
-        threading.Thread(target=self._process_path, args=(path,), daemon=True).start()
+            previous = self._pending.pop(path, None)
+            if previous is not None:
+                previous.cancel()
+            timer = threading.Timer(self.DEBOUNCE_SECONDS, self._submit_now, args=(path,))
+            timer.daemon = True
+            self._pending[path] = timer
+        timer.start()
+
+    def _submit_now(self, path: Path) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+            if self._shutting_down or path in self._in_flight:
+                return
+            self._closed.setdefault(path, threading.Event())
+            future = self._pool.submit(self._process_path, path)
+            self._in_flight[path] = future
+        # The done-callback is the single cleanup point for the in-flight
+        # entry, whether the job succeeds, raises, or is cancelled.
+        future.add_done_callback(lambda future, path=path: self._forget(path, future))
+
+    def _forget(self, path: Path, future: Future) -> None:
+        if not future.cancelled():
+            exc = future.exception()
+            if exc is not None:
+                logging.error("Unexpected error while processing %s", path, exc_info=exc)
+        with self._lock:
+            self._in_flight.pop(path, None)
+            self._closed.pop(path, None)
 
     def _should_ignore(self, path: Path) -> bool:
-        suffix = path.suffix.lower()
-        if suffix not in self.config.image_exts and suffix not in self.config.video_exts:
+        # Belt-and-braces re-check of the pattern filter; deliberately free of
+        # syscalls — deleted files are caught later by wait_for_file_ready.
+        if path.suffix.lower() not in self._all_exts:
             return True
         if path.name.startswith("."):
             return True
-        if not path.exists():
-            return True
         return False
 
     def _process_path(self, path: Path) -> None:
-        try:
-            if not wait_for_file_ready(path):
-                logging.warning("File did not stabilize in time, skipping: %s", path)
-                return
+        with self._lock:
+            closed_event = self._closed.get(path)
 
-            suffix = path.suffix.lower()
-            if suffix in self.config.image_exts:
-                ensure_directory(self.config.image_output_dir)
-                convert_image_to_png(path, self.config.image_output_dir)
-            elif suffix in self.config.video_exts:
-                ensure_directory(self.config.video_output_dir)
-                convert_video_to_mp4(
-                    path,
-                    self.config.video_output_dir,
-                    self.config.ffmpeg_bin,
-                    self.config.video_crf,
-                    self.config.video_preset,
-                )
-            else:
-                logging.debug("No converter registered for %s", path)
-        finally:
-            with self._lock:
-                self._in_progress.discard(path)
+        if not wait_for_file_ready(path, closed_event=closed_event):
+            logging.warning("File did not stabilize in time, skipping: %s", path)
+            return
+
+        suffix = path.suffix.lower()
+        if suffix in self.config.image_exts:
+            ensure_directory(self.config.image_output_dir)
+            run_image_job(path, self.config.image_output_dir, self.config)
+        elif suffix in self.config.video_exts:
+            ensure_directory(self.config.video_output_dir)
+            convert_video_to_mp4(path, self.config.video_output_dir, self.config)
+        else:
+            logging.debug("No converter registered for %s", path)
+
+
+def create_observer():
+    """
+    Pick the native watch backend explicitly rather than letting watchdog
+    guess at runtime: FSEvents on macOS, inotify on Linux. Falls back to
+    the auto-selecting Observer if the native backend cannot load.
+    """
+    try:
+        if sys.platform == "darwin":
+            from watchdog.observers.fsevents import FSEventsObserver
+
+            return FSEventsObserver()
+        if sys.platform.startswith("linux"):
+            from watchdog.observers.inotify import InotifyObserver
+
+            return InotifyObserver()
+    except ImportError as exc:
+        logging.warning("Native watch backend unavailable (%s); using default observer.", exc)
+    return Observer()
+
+
+def default_max_concurrent_video(hw_accel: str) -> int:
+    if hw_accel == "nvenc":
+        return 2
+    return max(1, (os.cpu_count() or 1) // FFMPEG_THREADS)
 
 
 def normalise_extensions(exts: Iterable[str]) -> Set[str]:
@@ -318,23 +721,51 @@ def normalise_extensions(exts: Iterable[str]) -> Set[str]:
 
 
 def process_existing_files(config: ConversionConfig) -> None:
-    for path in sorted(config.input_dir.iterdir()):
-        if path.is_file():
-            suffix = path.suffix.lower()
-            if suffix in config.image_exts or suffix in config.video_exts:
+    images = []
+    videos = []
+    # os.scandir hands back DirEntry objects whose is_file() answers come from
+    # the directory read itself, so enumeration costs one syscall, not 3N.
+    with os.scandir(config.input_dir) as it:
+        entries = sorted((e for e in it if e.is_file(follow_symlinks=False)), key=lambda e: e.name)
+    for entry in entries:
+        suffix = os.path.splitext(entry.name)[1].lower()
+        if suffix in config.image_exts:
+            images.append(Path(entry.path))
+        elif suffix in config.video_exts:
+            videos.append(Path(entry.path))
+
+    if not images and not videos:
+        return
+
+    cpu_count = os.cpu_count() or 1
+    jobs = []
+    # Image jobs mostly block on the shared decode process pool, so cheap
+    # threads suffice here; each ffmpeg uses FFMPEG_THREADS internally, so
+    # the video pool is sized to divide the machine between concurrent
+    # encodes.
+    with ThreadPoolExecutor(max_workers=cpu_count) as image_pool, ThreadPoolExecutor(
+        max_workers=max(1, cpu_count // FFMPEG_THREADS)
+    ) as video_pool:
+        if images:
+            ensure_directory(config.image_output_dir)
+            for path in images:
                 logging.info("Processing existing file: %s", path.name)
-                if suffix in config.image_exts:
-                    ensure_directory(config.image_output_dir)
-                    convert_image_to_png(path, config.image_output_dir)
-                else:
-                    ensure_directory(config.video_output_dir)
-                    convert_video_to_mp4(
-                        path,
-                        config.video_output_dir,
-                        config.ffmpeg_bin,
-                        config.video_crf,
-                        config.video_preset,
-                    )
+                jobs.append(
+                    (path, image_pool.submit(run_image_job, path, config.image_output_dir, config))
+                )
+        if videos:
+            ensure_directory(config.video_output_dir)
+            for path in videos:
+                logging.info("Processing existing file: %s", path.name)
+                jobs.append(
+                    (path, video_pool.submit(convert_video_to_mp4, path, config.video_output_dir, config))
+                )
+        concurrent.futures.wait([future for _, future in jobs])
+
+    for path, future in jobs:
+        exc = future.exception()
+        if exc is not None:
+            logging.error("Unexpected error while processing %s", path, exc_info=exc)
 
 
 def main() -> int:
@@ -342,16 +773,37 @@ def main() -> int:
     configure_logging()
     configure_image_plugins()
 
+    output_dir = args.output_dir.expanduser().resolve()
+    max_concurrent_video = (
+        default_max_concurrent_video(args.hw_accel)
+        if args.max_concurrent_video is None
+        else max(1, args.max_concurrent_video)
+    )
+    # HEIC/libheif decodes hold the GIL, so image decoding gets real
+    # processes; the initializer sets up logging and the HEIF opener in
+    # each worker.
+    image_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_image_worker)
     config = ConversionConfig(
         input_dir=args.input_dir.expanduser().resolve(),
-        output_dir=args.output_dir.expanduser().resolve(),
+        output_dir=output_dir,
         image_exts=normalise_extensions(args.image_ext) if args.image_ext is not None else set(IMAGE_EXTENSIONS),
         video_exts=normalise_extensions(args.video_ext) if args.video_ext is not None else set(VIDEO_EXTENSIONS),
         ffmpeg_bin=args.ffmpeg_bin,
         video_crf=args.video_crf,
         video_preset=args.video_preset,
+        hw_accel=args.hw_accel,
+        two_pass=args.two_pass,
+        video_bitrate=args.video_bitrate,
+        png_compress_level=args.png_compress_level,
+        max_concurrent_video=max_concurrent_video,
+        video_semaphore=threading.BoundedSemaphore(max_concurrent_video),
+        cache=ConversionCache.load(output_dir),
+        image_pool=image_pool,
     )
 
+    if args.two_pass and args.hw_accel != "none":
+        logging.warning("--two-pass only applies to libx264; ignoring it with --hw-accel=%s.", args.hw_accel)
+
     ensure_directory(config.input_dir)
     ensure_directory(config.output_dir)
 
@@ -359,7 +811,7 @@ def main() -> int:
         process_existing_files(config)
 
     handler = ConversionHandler(config)
-    observer = Observer()
+    observer = create_observer()
     observer.schedule(handler, str(config.input_dir), recursive=False)
 
     logging.info("Watching %s", config.input_dir)
@@ -375,6 +827,8 @@ def main() -> int:
     finally:
         observer.stop()
         observer.join()
+        handler.shutdown()
+        image_pool.shutdown(wait=False)
 
     return 0
 